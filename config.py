@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     request_timeout: int = 10  # seconds
     min_delay: float = 1.5     # seconds
     max_delay: float = 3.0     # seconds
+    max_concurrency: int = 10  # in-flight requests
 
     # Retry Settings
     max_retries: int = 5
@@ -30,6 +31,9 @@ class Settings(BaseSettings):
         'logs': 'logs',
     }
 
+    # Crawler Settings
+    checkpoint_interval: int = 25  # save progress every N processed URLs
+
     # Parser Settings
     remove_stopwords: bool = False
     deduplicate_links: bool = True
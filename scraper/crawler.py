@@ -1,8 +1,8 @@
-import json
+import orjson
 import os
 import logging
 from collections import deque
-from typing import Set, Deque, List, Optional
+from typing import Dict, Set, Deque, List, Optional, BinaryIO
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -19,66 +19,187 @@ class CrawlStatistics(BaseModel):
     total_failed: int = 0
 
 class CrawlState(BaseModel):
-    completed: Set[str] = set()
+    # Completed URLs live in their own append-only file, not in progress.json
+    completed: Set[str] = Field(default=set(), exclude=True)
     queued: Deque[str] = deque()
-    failed: List[FailedUrl] = []
+    # Mirror of queued for O(1) membership checks; rebuilt from queued on load
+    queued_set: Set[str] = Field(default=set(), exclude=True)
     statistics: CrawlStatistics = CrawlStatistics()
 
 class Crawler:
-    def __init__(self, progress_file: str = 'progress.json'):
+    def __init__(self, progress_file: str = 'progress.json', completed_file: str = 'completed.jsonl',
+                 failures_file: str = 'failures.jsonl'):
         self.progress_file = progress_file
+        self.completed_file = completed_file
+        self.failures_file = failures_file
         self.state = CrawlState()
         self.seed_urls = ["/wiki/Albert_Einstein", "/wiki/Marie_Curie", "/wiki/Isaac_Newton", "/wiki/Charles_Darwin"]
-        
+
+        self._dirty = False
+        # Popped by get_next_url but not yet marked completed (dict keeps pop order)
+        self._in_flight: Dict[str, None] = {}
+        self._completed_fd: Optional[BinaryIO] = None
+        self._failures_fd: Optional[BinaryIO] = None
+
         self._load_progress()
-        
+
         # Seed if empty
         if not self.state.queued and not self.state.completed:
             for url in self.seed_urls:
                 self._add_url(url)
 
     def _load_progress(self):
+        legacy_completed = False
+        legacy_failed: List[dict] = []
+
         if os.path.exists(self.progress_file):
             try:
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.progress_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                     # Handle potential malformed data or empty file
                     if data:
                         self.state = CrawlState(**data)
-                logger.info(f"Loaded progress: {len(self.state.completed)} completed, {len(self.state.queued)} queued")
+                        # Older progress files kept the completed set inline
+                        legacy_completed = 'completed' in data
+                        legacy_failed = data.get('failed') or []
             except Exception as e:
                 logger.error(f"Failed to load progress: {e}")
                 # Fallback to empty state if load fails
                 self.state = CrawlState()
 
+        if os.path.exists(self.completed_file):
+            try:
+                with open(self.completed_file, 'rb') as f:
+                    for line in f:
+                        try:
+                            self.state.completed.add(orjson.loads(line))
+                        except orjson.JSONDecodeError:
+                            # Blank or partially written line from an interrupted run
+                            continue
+            except Exception as e:
+                logger.error(f"Failed to load completed urls: {e}")
+
+        self.state.queued_set = set(self.state.queued)
+
+        if legacy_completed:
+            self._rewrite_completed()
+
+        if legacy_failed:
+            # Move failures out of older progress files into the append-only log
+            for failure in legacy_failed:
+                self._write_failure(failure)
+            self.state.statistics.total_failed = len(legacy_failed)
+
+        if legacy_completed or legacy_failed:
+            # Rewrite the old progress file right away so nothing gets migrated twice
+            self.save_progress()
+
+        if os.path.exists(self.progress_file) or os.path.exists(self.completed_file):
+            logger.info(f"Loaded progress: {len(self.state.completed)} completed, {len(self.state.queued)} queued")
+
+    def _rewrite_completed(self):
+        """Write the whole completed set to the sidecar file, e.g. when migrating an old progress file."""
+        tmp_path = self.completed_file + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(orjson.dumps(url) + b'\n' for url in self.state.completed))
+        os.replace(tmp_path, self.completed_file)
+
     def save_progress(self):
         # Update statistics before saving
         self.state.statistics.total_completed = len(self.state.completed)
         self.state.statistics.total_queued = len(self.state.queued)
-        self.state.statistics.total_failed = len(self.state.failed)
-        
+
         try:
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                f.write(self.state.model_dump_json(indent=4))
+            if self._completed_fd:
+                self._completed_fd.flush()
+
+            # model_dump(mode='json') turns the queued deque into a list for orjson
+            data = self.state.model_dump(mode='json')
+
+            # Write to a temp file and swap it in, so a crash never leaves a truncated progress file
+            tmp_path = self.progress_file + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.progress_file)
+            self._dirty = False
         except Exception as e:
             logger.error(f"Failed to save progress: {e}")
 
+    def checkpoint(self):
+        """Save progress, but only if anything changed since the last save."""
+        if self._dirty:
+            self.save_progress()
+
     def get_next_url(self) -> Optional[str]:
-        if not self.state.queued:
-            return None
-        return self.state.queued.popleft()
+        while self.state.queued:
+            self._dirty = True
+            url = self.state.queued.popleft()
+            self.state.queued_set.discard(url)
+            # completed.jsonl can be ahead of the queued snapshot after a crash
+            if url in self.state.completed:
+                continue
+            self._in_flight[url] = None
+            return url
+        return None
+
+    def requeue_in_flight(self):
+        """Put unfinished in-flight URLs back at the front of the queue, keeping their order."""
+        in_flight = list(self._in_flight)
+        self._in_flight.clear()
+        for url in reversed(in_flight):
+            if url in self.state.completed or url in self.state.queued_set:
+                continue
+            self.state.queued.appendleft(url)
+            self.state.queued_set.add(url)
+            self._dirty = True
+
+    def _is_known(self, url: str) -> bool:
+        return url in self.state.completed or url in self.state.queued_set or url in self._in_flight
 
     def _add_url(self, url: str):
-        if url not in self.state.completed and url not in self.state.queued:
+        if not self._is_known(url):
             self.state.queued.append(url)
+            self.state.queued_set.add(url)
+            self._dirty = True
 
     def add_urls(self, urls: List[str]):
-        for url in urls:
-            self._add_url(url)
-            
+        # dict.fromkeys dedupes the batch while keeping FIFO order
+        new = [url for url in dict.fromkeys(urls) if not self._is_known(url)]
+        if not new:
+            return
+        self.state.queued.extend(new)
+        self.state.queued_set.update(new)
+        self._dirty = True
+
     def mark_completed(self, url: str):
+        self._in_flight.pop(url, None)
+        if url in self.state.completed:
+            return
         self.state.completed.add(url)
-        
+
+        if self._completed_fd is None:
+            self._completed_fd = open(self.completed_file, 'ab')
+        self._completed_fd.write(orjson.dumps(url) + b'\n')
+        self._dirty = True
+
+    def _write_failure(self, failure: dict):
+        if self._failures_fd is None:
+            self._failures_fd = open(self.failures_file, 'ab')
+        self._failures_fd.write(orjson.dumps(failure) + b'\n')
+        # Failures are rare, so flush each one rather than risk losing it
+        self._failures_fd.flush()
+
     def log_failure(self, url: str, reason: str):
-        self.state.failed.append(FailedUrl(url=url, reason=str(reason)))
+        self._write_failure(FailedUrl(url=url, reason=str(reason)).model_dump())
+        self.state.statistics.total_failed += 1
+        self._dirty = True
 
+    def close(self):
+        """Flush and close the append-only sidecar files."""
+        for fd in (self._completed_fd, self._failures_fd):
+            if fd:
+                fd.close()
+        self._completed_fd = None
+        self._failures_fd = None
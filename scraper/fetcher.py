@@ -1,11 +1,10 @@
-import requests
+import asyncio
+import httpx
 import time
-import random
 import logging
 import os
 import urllib.parse
-from requests.exceptions import ConnectionError, Timeout, HTTPError
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from config import settings
 from scraper import pipeline
@@ -13,50 +12,109 @@ from scraper import pipeline
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize session
-session = requests.Session()
-session.headers.update({
+HEADERS = {
     "User-Agent": settings.user_agent,
     "Accept-Language": "en-US,en;q=0.9",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9",
-})
+}
+
+class RateLimiter:
+    """
+    Per-host token bucket shared by all in-flight requests.
+    Refills at the average rate implied by min_delay/max_delay, so the
+    overall request rate matches the old sequential sleep.
+    """
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate  # tokens per second
+        self._tokens: Dict[str, float] = {}
+        self._updated: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, host: str) -> None:
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                tokens = self._tokens.get(host, self.capacity)
+                elapsed = now - self._updated.get(host, now)
+                tokens = min(self.capacity, tokens + elapsed * self.rate)
+                self._updated[host] = now
+
+                if tokens >= 1:
+                    self._tokens[host] = tokens - 1
+                    return
+
+                self._tokens[host] = tokens
+                wait_time = (1 - tokens) / self.rate
+            await asyncio.sleep(wait_time)
+
+# Cap on concurrent requests, and the rate limit they share.
+# Capacity 1 means no bursts: request starts stay spaced out like the old sleep.
+semaphore = asyncio.Semaphore(settings.max_concurrency)
+rate_limiter = RateLimiter(
+    capacity=1,
+    rate=2 / (settings.min_delay + settings.max_delay),
+)
+
+def create_session() -> httpx.AsyncClient:
+    """
+    Create the shared HTTP client.
+    HTTP/2 multiplexes concurrent requests over one connection and reuses TLS state.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        headers=HEADERS,
+        timeout=settings.request_timeout,
+        limits=httpx.Limits(max_connections=settings.max_concurrency),
+    )
+
+_WIKI_PREFIX = '/wiki/'
 
 def extract_slug(url: str) -> str:
     """Extract article slug from URL."""
+    # Fast path: plain /wiki/ paths, which is what the crawler queues
+    if url.startswith(_WIKI_PREFIX) and not any(c in url for c in '?#;'):
+        return url[len(_WIKI_PREFIX):]
+
     # Handle full URL or path
     path = urllib.parse.urlparse(url).path
-    if path.startswith('/wiki/'):
-        return path.replace('/wiki/', '')
+    if path.startswith(_WIKI_PREFIX):
+        return path.replace(_WIKI_PREFIX, '')
     return path
 
-def fetch_with_retry(url: str, max_retries: int = settings.max_retries) -> requests.Response:
+async def fetch_with_retry(session: httpx.AsyncClient, url: str, max_retries: int = settings.max_retries) -> str:
     backoff = settings.initial_backoff
-    
+
     # Ensure URL is absolute if it's a path
     if url.startswith('/'):
         url = settings.base_url + url
-        
+
+    host = urllib.parse.urlparse(url).netloc
+
     for attempt in range(max_retries):
         try:
-            response = session.get(url, timeout=settings.request_timeout)
+            async with semaphore:
+                await rate_limiter.acquire(host)
+                response = await session.get(url)
             response.raise_for_status()
-            return response
-        except (ConnectionError, Timeout, HTTPError) as e:
+            return response.text
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
             if attempt == max_retries - 1:
                 logger.error(f"Failed after {max_retries} attempts: {url}")
                 raise
-            
+
             should_retry = True
-            if isinstance(e, HTTPError) and e.response.status_code not in [429, 503]:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in [429, 503]:
                 # Don't retry client errors (404, etc) unless it's a rate limit
                 should_retry = False
-            
+
             if should_retry:
                 wait_time = min(backoff, settings.max_backoff)
                 increment_backoff = True
-                
+
                 # Check for Retry-After header
-                if isinstance(e, HTTPError) and e.response.status_code in [429, 503]:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in [429, 503]:
                     retry_after = e.response.headers.get("Retry-After")
                     if retry_after:
                         try:
@@ -66,40 +124,37 @@ def fetch_with_retry(url: str, max_retries: int = settings.max_retries) -> reque
                         except ValueError:
                             pass # Fallback to standard backoff
 
-                logger.warning(f"Error fetching {url}: {e}. Retrying in {wait_time}s")
-                time.sleep(wait_time)
-                
+                logger.warning(f"Error fetching {url}: {e!r}. Retrying in {wait_time}s")
+                await asyncio.sleep(wait_time)
+
                 if increment_backoff:
                     backoff *= 2
             else:
                 raise
-    raise Exception("Unreachable code") 
+    raise Exception("Unreachable code")
 
-def fetch_article(url: str) -> Optional[str]:
+async def fetch_article(session: httpx.AsyncClient, url: str) -> Optional[Tuple[str, str]]:
     """
     Download article and save to raw file.
-    Returns path to saved file.
+    Returns (article slug, path to saved file).
     """
     article_slug = extract_slug(url)
     raw_path = os.path.join(settings.output_dirs['raw'], f"{article_slug}.html")
-    
+
     # Skip if already downloaded
     if os.path.exists(raw_path):
         logger.info(f"Skipping {article_slug} (already downloaded)")
-        return raw_path
-    
-    # Download with retry logic
+        return article_slug, raw_path
+
+    # Download with retry logic (rate limiting happens per request attempt)
     try:
-        response = fetch_with_retry(url)
-        
+        html = await fetch_with_retry(session, url)
+
         # Save raw HTML
-        pipeline.save_html(raw_path, response.text)
+        pipeline.save_html(raw_path, html)
         logger.info(f"Downloaded {article_slug}")
-        
-        # Rate limit
-        time.sleep(random.uniform(settings.min_delay, settings.max_delay))
-        
-        return raw_path
+
+        return article_slug, raw_path
     except Exception as e:
-        logger.error(f"Failed to fetch {url}: {e}")
+        logger.error(f"Failed to fetch {url}: {e!r}")
         return None
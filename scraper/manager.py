@@ -1,8 +1,13 @@
 import argparse
+import asyncio
+import httpx
 import logging
 import sys
 import os
-from bs4 import BeautifulSoup
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
 
 from config import settings
 from scraper.crawler import Crawler
@@ -19,31 +24,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Byte-level patterns for is_scientist_article, so we never build a DOM just to classify
+_CATLINKS_RE = re.compile(rb'id="mw-normal-catlinks"[^>]*>(.*?)</div>', re.DOTALL)
+_INFOBOX_RE = re.compile(rb'<table[^>]*\sclass="(?:[^"]*\s)?infobox[\s"]')
+_INFOBOX_SCAN_BYTES = 8192
+_TABLE_TAG_RE = re.compile(rb'<(/?)table[\s>]', re.IGNORECASE)
+_SCIENTIST_RE = re.compile(rb'scientist|physicist|chemist|biologist|astronomer|mathematician|nobel|fellow|academic|researcher')
+
+def _infobox_end(data: bytes, start: int) -> int:
+    """
+    Find the end of the table opened at start, skipping nested tables.
+    Returns at most start + _INFOBOX_SCAN_BYTES.
+    """
+    limit = start + _INFOBOX_SCAN_BYTES
+    depth = 0
+    for tag in _TABLE_TAG_RE.finditer(data, start, limit):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return tag.start()
+    return limit
+
 def is_scientist_article(html_path: str) -> bool:
     """
     Heuristic to check if article is about a person/scientist.
     """
     try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'lxml')
+        with open(html_path, 'rb') as f:
+            data = f.read()
             
         # Check categories
-        cat_links = soup.find('div', {'id': 'mw-normal-catlinks'})
+        cat_links = _CATLINKS_RE.search(data)
         if cat_links:
-            text = cat_links.get_text().lower()
-            keywords = ['scientist', 'physicist', 'chemist', 'biologist', 
-                       'astronomer', 'mathematician', 'nobel', 'fellow', 'academic',
-                       'researcher']
-            if any(k in text for k in keywords):
+            if _SCIENTIST_RE.search(cat_links.group(1).lower()):
                 return True
         
         # Check infobox for "Born" to see if it's a person
-        infobox = soup.find('table', {'class': 'infobox'})
+        infobox = _INFOBOX_RE.search(data)
         if not infobox:
             return False
         
-        text = infobox.get_text().lower()
-        if 'born' in text:
+        # Only look inside the infobox: stop at its matching closing tag
+        start = infobox.start()
+        text = data[start:_infobox_end(data, start)].lower()
+        if b'born' in text:
             return True
                 
         return False
@@ -53,11 +76,78 @@ def is_scientist_article(html_path: str) -> bool:
 
 def get_collected_count() -> int:
     """Count number of successfully processed articles."""
+    count = 0
     try:
-        return len([name for name in os.listdir(settings.output_dirs['words']) if not name.startswith('.')])
+        # Count entries as we go instead of building a list of every name
+        with os.scandir(settings.output_dirs['words']) as entries:
+            for entry in entries:
+                if not entry.name.startswith('.'):
+                    count += 1
+        return count
     except FileNotFoundError:
         return 0
 
+def classify_and_parse(html_path: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Classify and parse one HTML file in a worker process.
+    Returns (words, links), or None if the article is not about a scientist.
+    """
+    if not is_scientist_article(html_path):
+        return None
+    return parser.parse_article(html_path)
+
+async def process_url(session: httpx.AsyncClient, pool: ProcessPoolExecutor, crawler: Crawler, url: str) -> bool:
+    """
+    Fetch, classify, parse and save a single article.
+    Returns True if the article was collected.
+    """
+    logger.info(f"Processing {url}")
+
+    try:
+        # Fetch
+        fetched = await fetcher.fetch_article(session, url)
+        if not fetched:
+            crawler.log_failure(url, "Download failed")
+            crawler.mark_completed(url)
+            return False
+        article_slug, raw_path = fetched
+
+        # Check if Scientist and parse, off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(pool, classify_and_parse, raw_path)
+        if result is None:
+            logger.debug(f"Skipping {url} - does not appear to be a scientist.")
+            # We mark as completed (visited) so we don't try again
+            crawler.mark_completed(url)
+
+            # If it's not a scientist, delete it.
+            try:
+                os.remove(raw_path)
+            except OSError as e:
+                logger.warning(f"Could not delete non-scientist file {raw_path}: {e}")
+            return False
+
+        words, links = result
+
+        # Save Processed
+        pipeline.save_processed_data(article_slug, words, links)
+
+        # Update Crawler
+        crawler.add_urls(links)
+        crawler.mark_completed(url)
+        return True
+
+    except BrokenProcessPool:
+        # A crashed worker is not this article's fault: leave the URL in flight
+        # so main() stops and requeues it instead of marking it completed
+        raise
+
+    except Exception as e:
+        logger.error(f"Error processing {url}: {e}")
+        crawler.log_failure(url, str(e))
+        crawler.mark_completed(url) # Mark tried
+        return False
+
 def main() -> None:
     parser_args = argparse.ArgumentParser(description="Wikipedia Scientist Scraper")
     parser_args.add_argument('--count', type=int, default=settings.target_article_count, help='Number of articles to collect in this run')
@@ -73,65 +163,70 @@ def main() -> None:
     
     logger.info(f"Starting crawl. Target for this session: {session_target} articles.")
 
-    try:
-        while True:
-            if session_collected >= session_target:
-                logger.info(f"Reached session target {session_target}. Stopping.")
-                break
-                
-            url = crawler.get_next_url()
-            if not url:
-                logger.info("Queue empty. Stopping.")
-                break
-                
-            logger.info(f"Processing {url}")
-            
-            try:
-                # Fetch
-                raw_path = fetcher.fetch_article(url)
-                if not raw_path:
-                    crawler.log_failure(url, "Download failed")
-                    crawler.mark_completed(url)
-                    continue
-                    
-                # Check if Scientist
-                if not is_scientist_article(raw_path):
-                    logger.debug(f"Skipping {url} - does not appear to be a scientist.")
-                    # We mark as completed (visited) so we don't try again
-                    crawler.mark_completed(url)
-                    
-                    # If it's not a scientist, delete it.
-                    try:
-                        os.remove(raw_path)
-                    except OSError as e:
-                        logger.warning(f"Could not delete non-scientist file {raw_path}: {e}")
-                    continue
-                    
-                # Parse
-                words, links = parser.parse_article(raw_path)
-                
-                # Save Processed
-                article_slug = fetcher.extract_slug(url)
-                pipeline.save_processed_data(article_slug, words, links)
-                
-                # Update Crawler
-                crawler.add_urls(links)
-                crawler.mark_completed(url)
-                
-                session_collected += 1
-                total_collected += 1
-                logger.info(f"Completed {url}. Session: {session_collected}/{session_target} (Total saved: {total_collected})")
+    # Parsing is CPU-bound, so it runs in worker processes alongside the fetches
+    pool = ProcessPoolExecutor(max_workers=os.cpu_count())
 
-            except Exception as e:
-                logger.error(f"Error processing {url}: {e}")
-                crawler.log_failure(url, str(e))
-                crawler.mark_completed(url) # Mark tried
+    async def run() -> None:
+        nonlocal session_collected, total_collected
+        processed_since_checkpoint = 0
+
+        async with fetcher.create_session() as session:
+            while True:
+                if session_collected >= session_target:
+                    logger.info(f"Reached session target {session_target}. Stopping.")
+                    break
+
+                # Pull a batch, never more than we still need this session
+                batch_size = min(settings.max_concurrency, session_target - session_collected)
+                batch = []
+                while len(batch) < batch_size:
+                    url = crawler.get_next_url()
+                    if not url:
+                        break
+                    batch.append(url)
+
+                if not batch:
+                    logger.info("Queue empty. Stopping.")
+                    break
+
+                results = await asyncio.gather(
+                    *(process_url(session, pool, crawler, url) for url in batch),
+                    return_exceptions=True,
+                )
+
+                for url, collected in zip(batch, results):
+                    if not collected or isinstance(collected, BaseException):
+                        continue
+                    session_collected += 1
+                    total_collected += 1
+                    logger.info(f"Completed {url}. Session: {session_collected}/{session_target} (Total saved: {total_collected})")
+
+                # Count what finished first, then let a broken pool stop the run
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+
+                # Periodically persist progress so a crash loses at most one interval
+                processed_since_checkpoint += len(batch)
+                if processed_since_checkpoint >= settings.checkpoint_interval:
+                    crawler.checkpoint()
+                    processed_since_checkpoint = 0
+
+    try:
+        asyncio.run(run())
 
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
+
+    except BrokenProcessPool as e:
+        logger.error(f"Parser worker process crashed ({e}). Stopping; unfinished URLs will be retried next run.")
     
     finally:
+        pool.shutdown(cancel_futures=True)
+        # URLs from an interrupted batch go back in the queue instead of being dropped
+        crawler.requeue_in_flight()
         crawler.save_progress()
+        crawler.close()
         logger.info(f"Saved progress. Collected {session_collected} articles this session.")
 
 if __name__ == "__main__":
@@ -1,16 +1,70 @@
-from bs4 import BeautifulSoup
-import re
+from lxml import etree, html
 import logging
-from typing import List, Tuple, Optional, Any
+from typing import List, Tuple, Optional
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
-def clean_content(soup: BeautifulSoup) -> Optional[Any]:
+class _PunctTable(dict):
+    """
+    str.translate table that deletes everything except word characters and
+    whitespace, plus the phonetic modifiers ˈ (U+02C8), ː (U+02D0), ˌ (U+02CC)
+    which count as letters for the regex word class.
+    Entries are filled in on first lookup, so we don't build a table over
+    every Unicode codepoint at import time.
+    """
+    def __missing__(self, cp: int) -> Optional[int]:
+        char = chr(cp)
+        value = cp if char.isalnum() or char.isspace() or char == '_' else None
+        self[cp] = value
+        return value
+
+_PUNCT_TABLE = _PunctTable({0x02C8: None, 0x02D0: None, 0x02CC: None})
+
+# Raw files are always written as UTF-8 by pipeline.save_html
+_HTML_PARSER = html.HTMLParser(encoding='utf-8')
+
+def _has_class(css_class: str) -> str:
+    """XPath predicate matching a whole class token, like BeautifulSoup's class_ filter."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')"
+
+# Remove unwanted elements
+# "Table of Contents: <div id="vector-toc"> with class vector-toc"
+# "Infoboxes: Tables and divs with class infobox"
+# "Navigation boxes: Divs with class navbox"
+# "Reference sections: Divs with class reflist or references"
+# "Side panels: Divs with class sidebar"
+UNWANTED_CLASSES = [
+    'vector-toc', 'infobox', 'navbox', 'reflist', 'references', 'sidebar', 
+    'mw-editsection', 'noprint', 'IPA', 'rt-comment'
+]
+
+# Specific tags that are usually metadata/noise
+UNWANTED_TAGS = ['style', 'script', 'noscript', 'meta', 'link']
+
+# Compiled once: a single traversal finds every node to drop
+_DROP_XPATH = etree.XPath(
+    "descendant::*["
+    + " or ".join([_has_class(css_class) for css_class in UNWANTED_CLASSES]
+                  + [f"self::{tag}" for tag in UNWANTED_TAGS])
+    + "]"
+)
+
+# Compiled once and reused for every article
+_CONTENT_TEXT_XPATH = etree.XPath("//div[@id='mw-content-text']")
+_PARSER_OUTPUT_XPATH = etree.XPath(f".//div[{_has_class('mw-parser-output')}]")
+_ALL_PARSER_OUTPUT_XPATH = etree.XPath(f"//div[{_has_class('mw-parser-output')}]")
+
+# Paragraphs, their text nodes, and their internal /wiki/ links
+_P_XPATH = etree.XPath('.//p')
+_P_TEXT_XPATH = etree.XPath('.//text()', smart_strings=False)
+_P_LINK_XPATH = etree.XPath(".//a[starts-with(@href, '/wiki/')]/@href", smart_strings=False)
+
+def clean_content(root: html.HtmlElement) -> Optional[html.HtmlElement]:
     """
     Find main content container and remove unwanted elements.
-    Returns the cleaned soup element (or selection of elements).
+    Returns the cleaned content element.
     """
     # Main Content Container
     # "Wikipedia uses <div class="mw-parser-output"> for the main article content"
@@ -18,161 +72,121 @@ def clean_content(soup: BeautifulSoup) -> Optional[Any]:
     # We must prioritize the one inside #mw-content-text
     
     content = None
-    mw_content_text = soup.find('div', {'id': 'mw-content-text'})
+    mw_content_text = next(iter(_CONTENT_TEXT_XPATH(root)), None)
     
-    if mw_content_text:
-        content = mw_content_text.find('div', {'class': 'mw-parser-output'})
+    if mw_content_text is not None:
+        content = next(iter(_PARSER_OUTPUT_XPATH(mw_content_text)), None)
     
     # Fallback if not inside mw-content-text or if mw-content-text missing
-    if not content:
+    if content is None:
         # Heuristic: find all and take the one with the most paragraphs
-        divs = soup.find_all('div', {'class': 'mw-parser-output'})
+        divs = _ALL_PARSER_OUTPUT_XPATH(root)
         if divs:
-            content = max(divs, key=lambda d: len(d.find_all('p', recursive=False))) # Using recursive=False might be safer for strict structure or True for nested
+            content = max(divs, key=lambda d: len(d.findall('p')))
             # Actually, just most p tags generally
-            if not content.find('p'):
-                 content = max(divs, key=lambda d: len(d.find_all('p')))
+            if content.find('.//p') is None:
+                 content = max(divs, key=lambda d: len(d.findall('.//p')))
     
-    if not content:
+    if content is None:
         # Final fallback to mw-content-text direct
         content = mw_content_text
         
-    if not content:
+    if content is None:
         return None
 
-    # Remove unwanted elements
-    # "Table of Contents: <div id="vector-toc"> with class vector-toc"
-    # "Infoboxes: Tables and divs with class infobox"
-    # "Navigation boxes: Divs with class navbox"
-    # "Reference sections: Divs with class reflist or references"
-    # "Side panels: Divs with class sidebar"
-    
-    unwanted_classes = [
-        'vector-toc', 'infobox', 'navbox', 'reflist', 'references', 'sidebar', 
-        'mw-editsection', 'noprint', 'IPA', 'rt-comment'
-    ]
-    
-    # Remove by class
-    for css_class in unwanted_classes:
-        for tag in content.find_all(class_=css_class):
-            tag.decompose()
-            
-    # Remove specific tags that are usually metadata/noise
-    for tag in content.find_all(['style', 'script', 'noscript', 'meta', 'link']):
-        tag.decompose()
+    # Remove unwanted elements (see _DROP_XPATH)
+    # drop_tree (unlike getparent().remove) keeps the tail text that follows the node
+    for node in _DROP_XPATH(content):
+        node.drop_tree()
         
     return content
 
-def extract_words(content: Any) -> str:
+def clean_words(text: str) -> str:
+    """
+    Clean the text of a single paragraph.
+    Returns lowercased text with punctuation removed.
+    """
+    # Lowercase, then drop punctuation and phonetic modifiers in one pass
+    return text.lower().translate(_PUNCT_TABLE)
+
+def clean_link(href: str) -> Optional[str]:
     """
-    Extract clean words from soup content.
-    Returns space-delimited string.
+    Normalize a single href.
+    Returns the link path if it is an internal article link, otherwise None.
+    """
+    # Handle fragments: "Should strip fragments but keep the base article link"
+    if '#' in href:
+        href = href.split('#')[0]
+        
+    # Skip empty links after split
+    if not href:
+        return None
+
+    # Only internal Wikipedia article links
+    # Excluding ':' drops every non-article namespace in one check:
+    # "Special pages (EXCLUDE): /wiki/Special:*, /wiki/Help:*, /wiki/Wikipedia:*"
+    # "Categories (EXCLUDE): /wiki/Category:*"
+    # "Files (EXCLUDE): /wiki/File:*"
+    if href.startswith('/wiki/') and ':' not in href:
+        return href
+    
+    return None
+
+def extract_words_and_links(content: Optional[html.HtmlElement]) -> Tuple[str, List[str]]:
+    """
+    Extract clean words and internal Wikipedia links in a single pass.
+    Returns (space-delimited words, list of link paths).
     Strategies:
     - Focus on <p> tags for main content.
     """
-    if not content:
-        return ""
+    if content is None:
+        return "", []
         
     text_parts = []
+    links = []
     
     # Focus on <p> (paragraph) tags for main content
     # We iterate over paragraphs to avoid getting text from random divs/tables/etc
-    paragraphs = content.find_all('p', recursive=True)
-    
-    for p in paragraphs:
-        # Get text
-        text = p.get_text(separator=' ')
-        # Clean: Lowercase 
-        text_lower = text.lower()
-        
-        # Remove punctuation AND specific phonetic symbols that might slip through \w
-        # \w matches unicode letters, including modifier letters used in IPA (ˈ, ː, etc)
-        # We explicitly remove them here.
-        cleaned = re.sub(r'[^\w\s]', '', text_lower)
-        
-        # Additional cleanup for phonetic modifiers if not removed by class exclusion
-        # ˈ (U+02C8), ː (U+02D0), ˌ (U+02CC)
-        cleaned = re.sub(r'[ˈːˌ]', '', cleaned)
-        
+    # This (hopefully) also ensures only contextually relevant links are captured
+    for p in _P_XPATH(content):
+        cleaned = clean_words(' '.join(_P_TEXT_XPATH(p)))
         if cleaned.strip():
             text_parts.append(cleaned)
+        
+        for href in _P_LINK_XPATH(p):
+            href = clean_link(href)
+            if href:
+                links.append(href)
             
     full_text = ' '.join(text_parts)
     
     # Normalize whitespace (single space-delimited)
-    return ' '.join(full_text.split())
-
-def extract_links(content: Any) -> List[str]:
-    """
-    Extract internal Wikipedia links.
-    Returns list of link paths (e.g. /wiki/Article).
-    """
-    if not content:
-        return []
-
-    links = []
-    
-    # Focus on <p> (paragraph) tags for main content
-    # This (hopefully) ensures only contextually relevant links are captured
-    paragraphs = content.find_all('p', recursive=True)
-    
-    for p in paragraphs:
-        for a in p.find_all('a', href=True):
-            href = a['href']
-            
-            # Handle fragments: "Should strip fragments but keep the base article link"
-            if '#' in href:
-                href = href.split('#')[0]
-                
-            # Skip empty links after split
-            if not href:
-                continue
-
-            # Only internal Wikipedia article links
-            if href.startswith('/wiki/') and ':' not in href:
-                # Exclude special pages (redundant check if : is excluded, but explicit is good)
-                # "Special pages (EXCLUDE): /wiki/Special:*, /wiki/Help:*, /wiki/Wikipedia:*"
-                # "Categories (EXCLUDE): /wiki/Category:*"
-                # "Files (EXCLUDE): /wiki/File:*"
-                if not any(x in href for x in ['File:', 'Category:', 'Help:', 'Special:', 'Wikipedia:']):
-                    links.append(href)
+    words = ' '.join(full_text.split())
     
     if settings.deduplicate_links:
         # Deduplicate while preserving order
-        seen = set()
-        unique_links = []
-        for link in links:
-            if link not in seen:
-                seen.add(link)
-                unique_links.append(link)
-        return unique_links
+        links = list(dict.fromkeys(links))
         
-    return links
+    return words, links
 
 def parse_article(html_path: str) -> Tuple[str, List[str]]:
     """
     Parse HTML file and return (words, links).
     """
     try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html = f.read()
-        
-        soup = BeautifulSoup(html, 'lxml')
+        # Let lxml read the file itself instead of going through an intermediate str
+        with open(html_path, 'rb') as f:
+            root = html.parse(f, parser=_HTML_PARSER).getroot()
         
         # Clean and prepare content
-        content = clean_content(soup)
+        content = clean_content(root) if root is not None else None
         
-        if not content:
+        if content is None:
             logger.warning(f"Could not find valid content in {html_path}")
             return "", []
 
-        # Extract words
-        words = extract_words(content)
-        
-        # Extract links
-        links = extract_links(content)
-        
-        return words, links
+        # Extract words and links
+        return extract_words_and_links(content)
     except Exception as e:
         logger.error(f"Error parsing {html_path}: {e}")
         return "", []
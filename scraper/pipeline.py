@@ -1,31 +1,47 @@
 import os
-from typing import List
+from typing import List, Set
 from config import settings
 
+# Directories we already know exist, so makedirs runs once per directory
+_created_dirs: Set[str] = set()
+
+def _ensure_dir(path: str) -> None:
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Write bytes straight to a file descriptor, skipping the text I/O layers."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
 def create_directories() -> None:
     """Create all necessary directories defined in config."""
     for path in settings.output_dirs.values():
-        os.makedirs(path, exist_ok=True)
+        _ensure_dir(path)
 
 def save_html(path: str, content: str) -> None:
     """Save raw HTML content to file."""
     # Ensure directory exists just in case
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    _ensure_dir(os.path.dirname(path))
+    _write_bytes(path, content.encode('utf-8'))
 
 def save_processed_data(article_slug: str, words: str, links: List[str]) -> None:
     """Save processed words and links."""
     words_path = os.path.join(settings.output_dirs['words'], article_slug)
     links_path = os.path.join(settings.output_dirs['links'], article_slug)
-    
+
     # Save words (single line)
-    with open(words_path, 'w', encoding='utf-8') as f:
-        f.write(words)
-    
+    _write_bytes(words_path, words.encode('utf-8'))
+
     # Save links (one per line)
-    with open(links_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(links))
+    _write_bytes(links_path, '\n'.join(links).encode('utf-8'))
 
 def extract_slug_from_path(path: str) -> str:
     """Helper to get slug if full path is passed, though usually we pass slug."""